@@ -1,49 +1,105 @@
 import os
 import sys
+import argparse
 import pandas as pd
 import numpy as np
 from pathlib import Path
 import re
+import io
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+_PVAL_TOKEN = b"p-value of"
+_PVAL_RE = re.compile(rb"p-value of ([0-9.eE+-]+)")
+
+COLUMN_ORDER = [
+    "Instance",
+    "HV_MOEA_D", "HV_COMOLS_D", "HV_NSGA2",
+    "EPS_MOEA_D", "EPS_COMOLS_D", "EPS_NSGA2",
+    "IGD_MOAE_D", "IGD_COMOLS_D", "IGD_NSGA2",
+    "Kruskal Wallis Test (HV)", "Kruskal Wallis Test (EPS)", "Kruskal Wallis Test (IGD)"
+]
+TEXT_COLUMNS = {"Instance", "Kruskal Wallis Test (HV)", "Kruskal Wallis Test (EPS)", "Kruskal Wallis Test (IGD)"}
+
+@lru_cache(maxsize=4096)
+def _list_dir_lower(path):
+    """
+    Lista o diretório uma vez como pares (nome, nome em minúsculas).
+    Seguro porque o diretório 'analysis' não muda durante a execução.
+    """
+    with os.scandir(path) as it:
+        return tuple((entry.name, entry.name.lower()) for entry in it)
 
-# O script espera o caminho do diretório 'analysis' como argumento
-if len(sys.argv) < 2:
-    print("Erro: O caminho para o diretório de análise não foi fornecido.")
-    sys.exit(1)
-
-base_dir = Path(sys.argv[1])
-results = []
+def expected_path(search_path, expected_name):
+    """
+    Retorna o caminho '<expected_name>.out', nome gerado pelo run_analysis.sh,
+    se ele existir; evita varrer o diretório no caso comum.
+    """
+    candidate = os.path.join(search_path, expected_name + ".out")
+    return candidate if os.path.isfile(candidate) else None
 
 def find_file(instance_path, sub_dir, expected_name):
     search_path = os.path.join(instance_path, sub_dir)
     if not os.path.exists(search_path):
         return None
-    for f in os.listdir(search_path):
-        if expected_name.lower() in f.strip().lower():
-            return os.path.join(search_path, f)
+    direct = expected_path(search_path, expected_name)
+    if direct:
+        return direct
+    needle = expected_name.lower()
+    for name, name_lower in _list_dir_lower(search_path):
+        if needle in name_lower:
+            return os.path.join(search_path, name)
     return None
 
-def parse_kruskal_wallis(file_path):
+def find_files(instance_path, sub_dir, expected_names):
+    """
+    Retorna, para cada chave de 'expected_names', o arquivo '<nome>.out' ou,
+    na falta dele, o primeiro arquivo cujo nome contém o valor associado,
+    varrendo o subdiretório no máximo uma vez. Chaves sem correspondência
+    ficam com None.
+    """
+    found = dict.fromkeys(expected_names)
+    search_path = os.path.join(instance_path, sub_dir)
+    if not os.path.exists(search_path):
+        return found
+    for key, name in expected_names.items():
+        found[key] = expected_path(search_path, name)
+    # Varredura sem distinção de maiúsculas só para nomes fora do padrão
+    needles = {key: name.lower() for key, name in expected_names.items() if found[key] is None}
+    if not needles:
+        return found
+    for name, name_lower in _list_dir_lower(search_path):
+        for key, needle in needles.items():
+            if found[key] is None and needle in name_lower:
+                found[key] = os.path.join(search_path, name)
+    return found
+
+def parse_kruskal_wallis(file_path, full=True):
     """
     Lê todas as linhas do arquivo Kruskal-Wallis e retorna apenas aquelas
     com p-value <= 0.05. Se nenhuma linha atender ao critério, retorna 'H0'.
+    Com full=False, retorna 'significant' no primeiro p-value <= 0.05 sem
+    ler o restante do arquivo.
     """
     if not file_path or not os.path.exists(file_path):
         return "N/A"
 
     significant_lines = []
-    pattern = re.compile(r"p-value of ([0-9.eE+-]+)")
 
-    with open(file_path, "r") as f:
+    # Leitura em bytes: só as linhas significativas são decodificadas
+    with open(file_path, "rb") as f:
         for line in f:
-            line = line.strip()
-            if not line:
+            # Filtro por substring (em C) antes de acionar a regex
+            if _PVAL_TOKEN not in line:
                 continue
-            match = pattern.search(line)
+            match = _PVAL_RE.search(line)
             if match:
                 try:
                     p_value = float(match.group(1))
                     if p_value <= 0.05:
-                        significant_lines.append(line)
+                        if not full:
+                            return "significant"
+                        significant_lines.append(line.strip().decode())
                 except ValueError:
                     continue
 
@@ -56,39 +112,39 @@ def read_values_and_calc_mean(file_path):
     """Lê os valores de um arquivo e calcula a média."""
     if not file_path or not os.path.exists(file_path):
         return np.nan
-    with open(file_path, "r") as f:
-        values = [float(line.strip()) for line in f if line.strip()]
-    return np.mean(values) if values else np.nan
-
-# Lendo a lista de instâncias processadas
-processed_instances_file = base_dir / "processed_instances.txt"
-if not processed_instances_file.exists():
-    print("Erro: O arquivo de instâncias processadas não foi encontrado.")
-    sys.exit(1)
-
-with open(processed_instances_file, 'r') as f:
-    instances = [line.strip() for line in f if line.strip()]
+    try:
+        with open(file_path, "r") as f:
+            text = f.read()
+        # Arquivo vazio ou só com linhas em branco (o run_analysis.sh acrescenta uma)
+        if not text or text.isspace():
+            return np.nan
+        values = np.loadtxt(io.StringIO(text), dtype=np.float64, ndmin=1)
+    except (OSError, ValueError):
+        return np.nan
+    return float(values.mean()) if values.size else np.nan
 
-# Itera apenas sobre as instâncias da lista
-for instance in instances:
+def process_instance(instance, base_dir, kruskal_full=True):
+    """
+    Reúne as médias das métricas e os resultados do Kruskal-Wallis de uma
+    instância, na ordem de COLUMN_ORDER. Retorna None se a instância não
+    puder ser processada.
+    """
     instance_path = os.path.join(base_dir, instance)
     if not os.path.isdir(instance_path):
         print(f"Aviso: Diretório da instância {instance} não encontrado.")
-        continue
+        return None
 
     try:
         # Encontra todos os arquivos de métricas
-        hv_moead_file = find_file(instance_path, "hypervolume", "HV_moead")
-        hv_comolsd_file = find_file(instance_path, "hypervolume", "HV_comolsd")
-        hv_nsga2_file = find_file(instance_path, "hypervolume", "HV_nsga2")
-        
-        eps_moead_file = find_file(instance_path, "epsilon_additive", "esp_ad_moead")
-        eps_comolsd_file = find_file(instance_path, "epsilon_additive", "esp_ad_comolsd")
-        eps_nsga2_file = find_file(instance_path, "epsilon_additive", "esp_ad_nsga2")
-        
-        igd_moead_file = find_file(instance_path, "igd", "IGD_moead") 
-        igd_comolsd_file = find_file(instance_path, "igd", "IGD_comolsd")
-        igd_nsga2_file = find_file(instance_path, "igd", "IGD_nsga2")
+        hv_files = find_files(instance_path, "hypervolume", {
+            "moead": "HV_moead", "comolsd": "HV_comolsd", "nsga2": "HV_nsga2"
+        })
+        eps_files = find_files(instance_path, "epsilon_additive", {
+            "moead": "esp_ad_moead", "comolsd": "esp_ad_comolsd", "nsga2": "esp_ad_nsga2"
+        })
+        igd_files = find_files(instance_path, "igd", {
+            "moead": "IGD_moead", "comolsd": "IGD_comolsd", "nsga2": "IGD_nsga2"
+        })
         
         # Encontra os arquivos do Kruskal-Wallis
         kruskal_hv_file = find_file(instance_path, "kruskal", "hv_saidakruskal")
@@ -96,57 +152,100 @@ for instance in instances:
         kruskal_igd_file = find_file(instance_path, "kruskal", "igd_saidakruskal")
 
         # Calcula as médias
-        hv_moead_mean = read_values_and_calc_mean(hv_moead_file)
-        hv_comolsd_mean = read_values_and_calc_mean(hv_comolsd_file)
-        hv_nsga2_mean = read_values_and_calc_mean(hv_nsga2_file)
+        hv_moead_mean = read_values_and_calc_mean(hv_files["moead"])
+        hv_comolsd_mean = read_values_and_calc_mean(hv_files["comolsd"])
+        hv_nsga2_mean = read_values_and_calc_mean(hv_files["nsga2"])
         
-        eps_moead_mean = read_values_and_calc_mean(eps_moead_file)
-        eps_comolsd_mean = read_values_and_calc_mean(eps_comolsd_file)
-        eps_nsga2_mean = read_values_and_calc_mean(eps_nsga2_file)
+        eps_moead_mean = read_values_and_calc_mean(eps_files["moead"])
+        eps_comolsd_mean = read_values_and_calc_mean(eps_files["comolsd"])
+        eps_nsga2_mean = read_values_and_calc_mean(eps_files["nsga2"])
         
-        igd_moead_mean = read_values_and_calc_mean(igd_moead_file) 
-        igd_comolsd_mean = read_values_and_calc_mean(igd_comolsd_file)
-        igd_nsga2_mean = read_values_and_calc_mean(igd_nsga2_file)
+        igd_moead_mean = read_values_and_calc_mean(igd_files["moead"]) 
+        igd_comolsd_mean = read_values_and_calc_mean(igd_files["comolsd"])
+        igd_nsga2_mean = read_values_and_calc_mean(igd_files["nsga2"])
 
         # Processa resultados do Kruskal-Wallis separadamente
-        kruskal_hv_result = parse_kruskal_wallis(kruskal_hv_file)
-        kruskal_eps_result = parse_kruskal_wallis(kruskal_eps_file)
-        kruskal_igd_result = parse_kruskal_wallis(kruskal_igd_file)
-
-        results.append({
-            "Instance": instance,
-            "HV_MOEA_D": hv_moead_mean,
-            "HV_COMOLS_D": hv_comolsd_mean,
-            "HV_NSGA2": hv_nsga2_mean,
-            "EPS_MOEA_D": eps_moead_mean,
-            "EPS_COMOLS_D": eps_comolsd_mean,
-            "EPS_NSGA2": eps_nsga2_mean,
-            "IGD_MOAE_D": igd_moead_mean,
-            "IGD_COMOLS_D": igd_comolsd_mean,
-            "IGD_NSGA2": igd_nsga2_mean,
-            "Kruskal Wallis Test (HV)": kruskal_hv_result,
-            "Kruskal Wallis Test (EPS)": kruskal_eps_result,
-            "Kruskal Wallis Test (IGD)": kruskal_igd_result
-        })
+        kruskal_hv_result = parse_kruskal_wallis(kruskal_hv_file, kruskal_full)
+        kruskal_eps_result = parse_kruskal_wallis(kruskal_eps_file, kruskal_full)
+        kruskal_igd_result = parse_kruskal_wallis(kruskal_igd_file, kruskal_full)
+
+        return (
+            instance,
+            hv_moead_mean, hv_comolsd_mean, hv_nsga2_mean,
+            eps_moead_mean, eps_comolsd_mean, eps_nsga2_mean,
+            igd_moead_mean, igd_comolsd_mean, igd_nsga2_mean,
+            kruskal_hv_result, kruskal_eps_result, kruskal_igd_result
+        )
 
     except Exception as e:
         print(f"Erro ao processar a instância {instance}: {e}")
+        return None
 
-if results:
-    column_order = [
-        "Instance",
-        "HV_MOEA_D", "HV_COMOLS_D", "HV_NSGA2",
-        "EPS_MOEA_D", "EPS_COMOLS_D", "EPS_NSGA2",
-        "IGD_MOAE_D", "IGD_COMOLS_D", "IGD_NSGA2",
-        "Kruskal Wallis Test (HV)", "Kruskal Wallis Test (EPS)", "Kruskal Wallis Test (IGD)"
-    ]
-    
-    df = pd.DataFrame(results, columns=column_order)
-    for col in df.columns:
-        if "Instance" not in col and "Kruskal" not in col:
-            df[col] = df[col].map('{:.4f}'.format)
-            
-    df.to_csv(base_dir.parent / "comparative_results.csv", index=False)
-else:
-    print("Nenhum resultado processado.")
+def main():
+    parser = argparse.ArgumentParser(description="Gera a tabela comparativa a partir do diretório 'analysis'.")
+    parser.add_argument("analysis_dir", help="caminho para o diretório 'analysis'")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv",
+                        help="formato da tabela de saída (padrão: csv)")
+    parser.add_argument("--kruskal-summary", action="store_true",
+                        help="colunas do Kruskal-Wallis indicam apenas 'significant' ou 'H0'")
+    args = parser.parse_args()
+
+    base_dir = Path(args.analysis_dir)
+    kruskal_full = not args.kruskal_summary
+    output_format = args.format
+
+    # Falha antes de processar as instâncias se o Parquet não puder ser escrito
+    if output_format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("Erro: O formato parquet requer o pacote 'pyarrow'.")
+            sys.exit(1)
+
+    # Lendo a lista de instâncias processadas
+    processed_instances_file = base_dir / "processed_instances.txt"
+    if not processed_instances_file.exists():
+        print("Erro: O arquivo de instâncias processadas não foi encontrado.")
+        sys.exit(1)
+
+    with open(processed_instances_file, 'r') as f:
+        instances = [line.strip() for line in f if line.strip()]
+
+    # Colunas pré-alocadas e preenchidas por índice, sem um dict por linha
+    columns = {
+        col: np.empty(len(instances), dtype=object if col in TEXT_COLUMNS else np.float64)
+        for col in COLUMN_ORDER
+    }
+    n_rows = 0
+
+    # Instâncias são independentes; map preserva a ordem da lista. Cada tarefa é
+    # curta, então o envio em lotes amortiza a comunicação entre processos
+    chunksize = max(1, len(instances) // (4 * (os.cpu_count() or 1)))
+    with ProcessPoolExecutor() as ex:
+        for row in ex.map(partial(process_instance, base_dir=base_dir, kruskal_full=kruskal_full),
+                          instances, chunksize=chunksize):
+            if row is None:
+                continue
+            for col, value in zip(COLUMN_ORDER, row):
+                columns[col][n_rows] = value
+            n_rows += 1
+
+    if n_rows:
+        # Colunas tipadas: métricas em float64, textos em string; formatação só na escrita
+        df = pd.DataFrame({
+            col: (pd.array(arr[:n_rows], dtype=pd.StringDtype()) if col in TEXT_COLUMNS else arr[:n_rows])
+            for col, arr in columns.items()
+        })
+        if output_format == "parquet":
+            # Parquet preserva a precisão total dos valores
+            df.to_parquet(base_dir.parent / "comparative_results.parquet", index=False,
+                          engine="pyarrow", compression="zstd")
+        else:
+            # Formatação feita pelo writer do pandas; na_rep mantém o "nan" da saída anterior
+            df.to_csv(base_dir.parent / "comparative_results.csv", index=False,
+                      float_format="%.4f", na_rep="nan")
+    else:
+        print("Nenhum resultado processado.")
 
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,71 @@
 import os
 import sys
+import re
+import io
 import numpy as np
 from pathlib import Path
-from pymoo.indicators.igd import IGD
+
+def check_two_columns(points, filepath):
+    if points.shape[1] != 2:
+        raise ValueError(f"{filepath}: found {points.shape[1]} values per line")
+    return points
 
 def read_reference_set(filepath):
-    points = []
-    with open(filepath, "r") as f:
-        for line in f:
-            vals = line.strip().split()
-            if len(vals) == 2:
-                points.append([float(vals[0]), float(vals[1])])
-    return np.array(points)
+    return check_two_columns(np.loadtxt(filepath, dtype=np.float64, ndmin=2), filepath)
 
 def read_solutions(filepath):
-    executions, current = [], []
-    with open(filepath, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                if current:
-                    executions.append(np.array(current))
-                    current = []
-                continue
-            vals = line.split()
-            if len(vals) == 2:
-                current.append([float(vals[0]), float(vals[1])])
-        if current:
-            executions.append(np.array(current))
-    return executions
+    # Execuções são separadas por linhas em branco; cada bloco é lido pelo parser em C.
+    # Toda linha deve ter exatamente dois valores numéricos; caso contrário levanta ValueError
+    raw = Path(filepath).read_text()
+    blocks = re.split(r"\n\s*\n", raw.strip())
+    return [check_two_columns(np.loadtxt(io.StringIO(b), dtype=np.float64, ndmin=2), filepath)
+            for b in blocks if b.strip()]
+
+# Abaixo deste número de pontos na execução, a força bruta supera a KD-tree
+KDTREE_MIN_POINTS = 64
+# Total de pares R * soma(P) a partir do qual a KD-tree compensa o import do
+# scipy.spatial (~0.27s); abaixo disso a força bruta em blocos termina antes
+KDTREE_MIN_PAIRS = 10 ** 8
+# Limite de pares (execução, referência, ponto) do caminho vetorizado único;
+# o array de diferenças ocupa E * R * P * 2 float64 (~4 MB neste limite)
+BROADCAST_MAX_PAIRS = 2 ** 18
+# Pontos de referência por bloco da força bruta; mantém a matriz parcial em cache
+BRUTE_BLOCK_ROWS = 64
+
+def igd_brute(reference_set, exe):
+    # Distâncias ao quadrado acumuladas por coordenada, em blocos de referência,
+    # sem o eixo final de tamanho 2 nem a matriz R x P inteira
+    best = np.empty(reference_set.shape[0])
+    for start in range(0, reference_set.shape[0], BRUTE_BLOCK_ROWS):
+        ref = reference_set[start:start + BRUTE_BLOCK_ROWS]
+        d2 = np.subtract.outer(ref[:, 0], exe[:, 0])
+        d2 *= d2
+        for k in range(1, ref.shape[1]):
+            diff = np.subtract.outer(ref[:, k], exe[:, k])
+            diff *= diff
+            d2 += diff
+        best[start:start + BRUTE_BLOCK_ROWS] = d2.min(axis=1)
+    return float(np.sqrt(best).mean())
+
+def igd_single(reference_set, exe, use_kdtree=False):
+    if use_kdtree and len(exe) >= KDTREE_MIN_POINTS:
+        # KD-tree sobre a execução: O((P + R) log P) em vez de O(R * P).
+        # Import tardio: scipy.spatial é caro para carregar e só é usado aqui
+        from scipy.spatial import cKDTree
+        return float(cKDTree(exe).query(reference_set, k=1)[0].mean())
+    return igd_brute(reference_set, exe)
 
 def compute_igd(reference_set, executions):
-    igd = IGD(reference_set)
-    return [igd(exe) for exe in executions]
+    # IGD: média, sobre os pontos de referência, da menor distância à execução
+    same_shape = executions and len({exe.shape for exe in executions}) == 1
+    if (same_shape and len(executions[0]) < KDTREE_MIN_POINTS
+            and len(executions) * reference_set.shape[0] * len(executions[0]) <= BROADCAST_MAX_PAIRS):
+        stack = np.stack(executions)
+        diff = reference_set[None, :, None, :] - stack[:, None, :, :]
+        dists = np.sqrt((diff ** 2).sum(axis=-1))
+        return [float(v) for v in dists.min(axis=2).mean(axis=1)]
+    use_kdtree = reference_set.shape[0] * sum(len(exe) for exe in executions) >= KDTREE_MIN_PAIRS
+    return [igd_single(reference_set, exe, use_kdtree) for exe in executions]
 
 def main(data_file_path: str, ref_file_path: str, output_file_path: str):
     data_file = Path(data_file_path)
@@ -46,8 +79,12 @@ def main(data_file_path: str, ref_file_path: str, output_file_path: str):
         print(f"[ERRO] Reference file not found: {ref_file}")
         sys.exit(1)
 
-    reference_set = read_reference_set(str(ref_file))
-    execs = read_solutions(str(data_file))
+    try:
+        reference_set = read_reference_set(str(ref_file))
+        execs = read_solutions(str(data_file))
+    except ValueError as e:
+        print(f"[ERRO] Invalid input (expected two objective values per line): {e}")
+        sys.exit(1)
     igd_values = compute_igd(reference_set, execs)
 
     with open(output_file, "w") as f: